@@ -1,13 +1,14 @@
 import irc.bot
 import discord
-import requests
 import asyncio
 import logging
 import json
 import hashlib
+import functools
 import re
 import aiohttp
-import time
+import orjson
+import threading
 
 # Load configuration from config.json
 with open("config.json", "r") as config_file:
@@ -46,27 +47,106 @@ def log_if_enabled(log_function, is_enabled, message, *args):
 IGNORED_IRC_NICKNAMES = config.get("ignored_irc_nicknames", [])
 IGNORED_MESSAGE_PATTERNS = config.get("ignored_message_patterns", [])
 
+# Patterns used on every relayed message, compiled once at load
+_CODEBLOCK_RE = re.compile(r'```(?:(\w+)\n)?([\s\S]*?)```')
+_DISCORD_EMOJI_RE = re.compile(r'<(a)?:([a-zA-Z0-9_]+):[0-9]+>')
+_CRLF_RE = re.compile(r'\r\n?')
+_CLEAN_TABLE = str.maketrans('', '', '\x00')
+# Mentions and emoji only count at the start of a token, so e-mail addresses and times are left alone
+_MENTION_RE = re.compile(r'(?<!\S)@([\w.]+)')
+_EMOJI_RE = re.compile(r'(?<!\S):(\w+):')
+_MENTION_TAG_RE = re.compile(r'<@!?([0-9]+)>')
+
+# Reconnect backoff for the IRC connection, in seconds
+IRC_RECONNECT_INITIAL_DELAY = 5
+IRC_RECONNECT_MAX_DELAY = 300
+# Conservative PRIVMSG payload size, leaving room in the 512-byte IRC line for the command and prefix
+IRC_MAX_MESSAGE_BYTES = 400
+# Total timeout for outbound HTTP requests, in seconds
+HTTP_TIMEOUT = 15
+# Attempts per webhook message before giving up on a rate-limited post
+WEBHOOK_MAX_ATTEMPTS = 3
+
+@functools.lru_cache(maxsize=4096)
+def _user_color(username):
+    # Consistent color per username from a small non-cryptographic digest
+    digest = hashlib.blake2b(username.encode(), digest_size=2).digest()
+    # IRC colors 2-13 (excluding 0,1,14,15 which are white/black/gray/white)
+    return (int.from_bytes(digest, 'little') % 12) + 2
+
+def _combine_patterns(patterns):
+    # Merge compiled patterns into one alternation so each message is scanned once.
+    # Patterns with groups (backreferences would be renumbered) or global inline
+    # flags (only allowed at the start of a regex) can't be merged safely, in which
+    # case None is returned and the patterns are searched one by one.
+    if not patterns:
+        return None
+    if any(pattern.groups or pattern.flags & ~re.UNICODE for pattern in patterns):
+        return None
+    return re.compile('|'.join(f'(?:{pattern.pattern})' for pattern in patterns))
+
+class NoReconnect(irc.bot.ReconnectStrategy):
+    # Reconnecting is handled by run_irc_bot, so the library's own strategy is disabled
+    def run(self, bot):
+        pass
+
 class IRCRelayBot(irc.bot.SingleServerIRCBot):
+    # The irc base classes don't define __slots__, so instances keep a __dict__,
+    # but the attributes used on every message are stored in slots
+    __slots__ = (
+        'username', 'realname', 'channel_webhook_map', 'connection_channels', '_webhook_channels',
+        'discord_users', 'discord_emojis', 'loop', '_webhook_locks', '_disconnect_event', '_stop_event', '_registered',
+        'ignored_patterns', '_ignored_combined', 'ignored_nicknames',
+    )
+
     def __init__(self, server, port, nickname, username, realname, channel_webhook_map):
-        super().__init__([(server, port)], nickname, realname)
+        super().__init__([(server, port)], nickname, realname, recon=NoReconnect())
         self.username = username
         self.realname = realname
         self.channel_webhook_map = channel_webhook_map
-        self.connection_channels = list(channel_webhook_map.keys())
+        self.connection_channels = tuple(channel_webhook_map)
+        self._webhook_channels = frozenset(channel_webhook_map)
         self.discord_users = {}
         self.discord_emojis = {}
+        # Event loop of the Discord bot, set from its setup_hook
+        self.loop = None
+        # Per-webhook locks, only touched from the Discord event loop
+        self._webhook_locks = {}
+        self._disconnect_event = threading.Event()
+        # Set on shutdown; unlike _disconnect_event it is never cleared by start()
+        self._stop_event = threading.Event()
+        # Whether the current connection got through registration (RPL_WELCOME)
+        self._registered = False
         logging.info("IRC bot initialized for server: %s:%d with nickname: %s", server, port, nickname)
 
         self.ignored_patterns = [re.compile(pattern) for pattern in IGNORED_MESSAGE_PATTERNS]
-        self.ignored_nicknames = set(IGNORED_IRC_NICKNAMES)
-        logging.info(f"Loaded {len(self.ignored_nicknames)} ignored nicknames and {len(self.ignored_patterns)} ignored patterns")
+        self._ignored_combined = _combine_patterns(self.ignored_patterns)
+        self.ignored_nicknames = frozenset(nickname.lower() for nickname in IGNORED_IRC_NICKNAMES)
+        logging.info("Loaded %d ignored nicknames and %d ignored patterns", len(self.ignored_nicknames), len(self.ignored_patterns))
 
     def start(self):
+        # Process IRC events until disconnected, returning whether the server accepted our registration
+        self._registered = False
         try:
             logging.info("Attempting to connect to IRC server: %s:%d", IRC_SERVER, IRC_PORT)
-            super().start()
+            self._connect()
+            self._disconnect_event.clear()
+            if not self.connection.is_connected():
+                return False
+            while not self._disconnect_event.is_set() and not self._stop_event.is_set():
+                self.reactor.process_once(timeout=0.2)
+            return self._registered
         except Exception as e:
             logging.error("Error during IRC connection: %s", e)
+            return False
+        finally:
+            # Send QUIT instead of dropping the socket when we are asked to stop
+            if self._stop_event.is_set() and self.connection.is_connected():
+                self.connection.disconnect("Relay bot shutting down")
+
+    def stop(self):
+        # Thread-safe: makes a running start() return at its next loop iteration
+        self._stop_event.set()
 
     def on_connect(self, connection, event):
         logging.info("Connected to IRC server: %s:%d", IRC_SERVER, IRC_PORT)
@@ -75,6 +155,7 @@ class IRCRelayBot(irc.bot.SingleServerIRCBot):
 
     def on_welcome(self, connection, event):
         logging.info("Received welcome message from IRC server: %s", event.arguments)
+        self._registered = True
         for channel in self.connection_channels:
             logging.info("Joining IRC channel: %s", channel)
             try:
@@ -83,17 +164,26 @@ class IRCRelayBot(irc.bot.SingleServerIRCBot):
                 logging.error("Failed to join channel %s: %s", channel, e)
 
     def should_ignore_message(self, nickname, message):
-        # Check if nickname is in ignored list
-        if nickname.lower() in self.ignored_nicknames:
-            logging.debug(f"Ignoring message from ignored nickname: {nickname}")
+        # Check if nickname is in ignored list (nickname is already lowercased by the caller)
+        if nickname in self.ignored_nicknames:
+            logging.debug("Ignoring message from ignored nickname: %s", nickname)
             return True
             
-        # Check if message matches any ignored pattern
+        # Check if message matches any ignored pattern, bailing out early when none are configured
+        if not self.ignored_patterns:
+            return False
+        combined = self._ignored_combined
+        if combined is not None:
+            if combined.search(message) is None:
+                return False
+            # Only look up which pattern matched when it is actually going to be logged
+            if not logging.getLogger().isEnabledFor(logging.DEBUG):
+                return True
+
         for pattern in self.ignored_patterns:
             if pattern.search(message):
-                logging.debug(f"Ignoring message matching pattern {pattern.pattern}: {message}")
+                logging.debug("Ignoring message matching pattern %s: %s", pattern.pattern, message)
                 return True
-                
         return False
 
     def on_pubmsg(self, connection, event):
@@ -103,7 +193,7 @@ class IRCRelayBot(irc.bot.SingleServerIRCBot):
         logging.debug("Message received on IRC channel %s: <%s> %s", irc_channel, nickname, message)
 
         # Check if message should be ignored
-        if self.should_ignore_message(nickname, message):
+        if self.should_ignore_message(nickname.lower(), message):
             return
 
         # Handle !emoji command
@@ -111,7 +201,7 @@ class IRCRelayBot(irc.bot.SingleServerIRCBot):
             self.send_emoji_list(connection, nickname)
             return
 
-        if irc_channel in self.channel_webhook_map:
+        if irc_channel in self._webhook_channels:
             self.send_to_discord(irc_channel, nickname, message)
 
     def send_to_discord(self, irc_channel, nickname, message):
@@ -123,96 +213,86 @@ class IRCRelayBot(irc.bot.SingleServerIRCBot):
         # Translate @mentions in the message
         translated_message = self.translate_mentions(message, webhook_url)
         
-        # Translate :emoji: to Discord emoji format
-        if not self.discord_emojis:
-            # Fetch emojis from all available guilds
-            for guild in discord_bot.guilds:
-                for emoji in guild.emojis:
-                    self.discord_emojis[emoji.name.lower()] = str(emoji)
-                logging.debug(f"Cached {len(guild.emojis)} emojis from guild {guild.name}")
-
-        # Replace :emoji: with Discord emoji format
-        words = translated_message.split()
-        for i, word in enumerate(words):
-            if word.startswith(':') and word.endswith(':'):
-                emoji_name = word[1:-1].lower()  # Remove colons and convert to lowercase
-                if emoji_name in self.discord_emojis:
-                    words[i] = self.discord_emojis[emoji_name]
-                    logging.debug(f"Translated emoji {emoji_name} to {self.discord_emojis[emoji_name]}")
-
-        translated_message = ' '.join(words)
+        # Replace :emoji: with Discord emoji format, skipping the scan when nothing can match
+        discord_emojis = self.discord_emojis
+        if discord_emojis and ':' in translated_message:
+            translated_message = _EMOJI_RE.sub(
+                lambda m: discord_emojis.get(m.group(1).lower(), m.group(0)),
+                translated_message
+            )
+
+        if self.loop is None:
+            logging.warning("Discord bot not ready, dropping message from %s", nickname)
+            return
 
         payload = {
             "username": nickname,
             "content": translated_message,
         }
-        try:
-            response = requests.post(webhook_url, json=payload)
-            response.raise_for_status()
-            logging.debug("Message relayed to Discord: <%s> %s", nickname, translated_message)
-        except requests.RequestException as e:
-            logging.error("Failed to send message to Discord: %s", e)
+        # Hand the request off to the Discord event loop so the IRC thread never blocks on HTTP
+        future = asyncio.run_coroutine_threadsafe(self._post_webhook(webhook_url, payload), self.loop)
+        future.add_done_callback(self._log_webhook_failure)
+
+    async def _post_webhook(self, webhook_url, payload):
+        # Posts to the same webhook go out one at a time, in the order they were received
+        lock = self._webhook_locks.get(webhook_url)
+        if lock is None:
+            lock = self._webhook_locks[webhook_url] = asyncio.Lock()
+
+        async with lock:
+            for _ in range(WEBHOOK_MAX_ATTEMPTS):
+                try:
+                    async with discord_bot.http_session.post(
+                        webhook_url,
+                        data=orjson.dumps(payload),
+                        headers={'Content-Type': 'application/json'}
+                    ) as response:
+                        if response.status != 429:
+                            response.raise_for_status()
+                            logging.debug("Message relayed to Discord: <%s> %s", payload["username"], payload["content"])
+                            return
+                        retry_after = float(response.headers.get('Retry-After', 1))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logging.error("Failed to send message to Discord: %s", e)
+                    return
+
+                logging.warning("Discord webhook rate limited, retrying in %.2f seconds", retry_after)
+                await asyncio.sleep(retry_after)
+
+            logging.error("Dropping message to Discord after %d rate limited attempts: <%s> %s",
+                          WEBHOOK_MAX_ATTEMPTS, payload["username"], payload["content"])
+
+    @staticmethod
+    def _log_webhook_failure(future):
+        # Surface anything _post_webhook didn't handle itself, e.g. a closed session
+        if not future.cancelled() and future.exception() is not None:
+            logging.error("Failed to send message to Discord: %r", future.exception())
 
     def translate_mentions(self, message, webhook_url):
         try:
-            if not self.discord_users:
-                # Get the guild ID from the Discord bot instead of webhook URL
-                for guild in discord_bot.guilds:
-                    bot_token = DISCORD_BOT_TOKEN
-                    headers = {'Authorization': f'Bot {bot_token}'}
-                    response = requests.get(f'https://discord.com/api/v10/guilds/{guild.id}/members?limit=1000', headers=headers)
-                    
-                    logging.debug(f"Discord API Response Status: {response.status_code}")
-                    if response.status_code == 200:
-                        members = response.json()
-                        logging.debug(f"Fetched {len(members)} members from Discord")
-                        
-                        for member in members:
-                            user = member['user']
-                            user_id = user['id']
-                            if 'global_name' in user and user['global_name']:
-                                self.discord_users[user['global_name'].lower()] = user_id
-                                logging.debug(f"Cached global_name: {user['global_name'].lower()} -> {user_id}")
-                            username = user['username'].lower()
-                            self.discord_users[username] = user_id
-                            logging.debug(f"Cached username: {username} -> {user_id}")
-
+            # discord_users is kept up to date by the Discord bot from the gateway member cache
             # Replace @mentions with Discord user IDs
-            words = message.split()
-            for i, word in enumerate(words):
-                if word.startswith('@'):
-                    username = word[1:].lower()  # Remove @ and convert to lowercase
-                    logging.debug(f"Looking up mention: {username}")
-                    if username in self.discord_users:
-                        user_id = self.discord_users[username]
-                        words[i] = f'<@{user_id}>'
-                        logging.debug(f"Translated mention {username} to <@{user_id}>")
-                    else:
-                        logging.debug(f"No match found for {username}. Available users: {list(self.discord_users.keys())}")
-            
-            translated = ' '.join(words)
-            logging.debug(f"Final translated message: {translated}")
+            translated = _MENTION_RE.sub(self._replace_mention, message)
+            logging.debug("Final translated message: %s", translated)
             return translated
         except Exception as e:
-            logging.error(f"Error translating mentions: {e}")
+            logging.error("Error translating mentions: %s", e)
             return message
 
-    def on_disconnect(self, connection, event):
-        initial_delay = 5  # Start with 5 seconds
-        max_delay = 300    # Maximum delay of 5 minutes (300 seconds)
-        current_delay = initial_delay
+    def _replace_mention(self, match):
+        username = match.group(1).lower()
+        user_id = self.discord_users.get(username)
+        if user_id is None:
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("No match found for %s. Available users: %s", username, list(self.discord_users.keys()))
+            return match.group(0)
+        logging.debug("Translated mention %s to <@%s>", username, user_id)
+        return f'<@{user_id}>'
 
-        while True:
-            logging.warning(f"Disconnected from IRC server. Attempting to reconnect in {current_delay} seconds...")
-            try:
-                time.sleep(current_delay)
-                self.start()
-                # If connection succeeds, break out of the loop
-                break
-            except Exception as e:
-                logging.error(f"Reconnection attempt failed: {e}")
-                # Double the delay for next attempt, but cap at max_delay
-                current_delay = min(current_delay * 2, max_delay)
+    def on_disconnect(self, connection, event):
+        logging.warning("Disconnected from IRC server: %s", event.arguments)
+        # Let start() return so run_irc_bot can schedule the reconnect
+        self._disconnect_event.set()
 
     def on_error(self, connection, event):
         logging.error("IRC Error: %s", event)
@@ -228,12 +308,6 @@ class IRCRelayBot(irc.bot.SingleServerIRCBot):
 
     def send_emoji_list(self, connection, nickname):
         try:
-            # Refresh emoji cache if empty
-            if not self.discord_emojis:
-                for guild in discord_bot.guilds:
-                    for emoji in guild.emojis:
-                        self.discord_emojis[emoji.name.lower()] = str(emoji)
-
             # Sort emojis alphabetically
             sorted_emojis = sorted(self.discord_emojis.keys())
             
@@ -251,49 +325,109 @@ class IRCRelayBot(irc.bot.SingleServerIRCBot):
                 
             connection.privmsg(nickname, "Use these emojis by surrounding them with colons, e.g., :emoji_name:")
             
-            logging.debug(f"Sent emoji list to {nickname}")
+            logging.debug("Sent emoji list to %s", nickname)
         except Exception as e:
-            logging.error(f"Error sending emoji list: {e}")
+            logging.error("Error sending emoji list: %s", e)
             connection.privmsg(nickname, "Error retrieving emoji list. Please try again later.")
 
     def on_invite(self, connection, event):
         channel = event.arguments[0]
         inviter = event.source.split('!')[0]
-        logging.info(f"Received invite to {channel} from {inviter}")
+        logging.info("Received invite to %s from %s", channel, inviter)
         try:
             connection.join(channel)
-            logging.info(f"Successfully joined {channel} after invite")
+            logging.info("Successfully joined %s after invite", channel)
         except Exception as e:
-            logging.error(f"Failed to join {channel} after invite: {e}")
+            logging.error("Failed to join %s after invite: %s", channel, e)
 
 class DiscordRelayBot(discord.Client):
     def __init__(self, irc_bot, discord_to_irc_map):
         intents = discord.Intents.default()
         intents.messages = True
         intents.message_content = True
+        intents.members = True
         super().__init__(intents=intents)
 
         self.irc_bot = irc_bot
         self.discord_to_irc_map = discord_to_irc_map
-        self.username_colors = {}
+        # Pooled HTTP session shared by webhook posts and sourceb.in uploads,
+        # created in setup_hook once the event loop is running
+        self.http_session = None
         log_if_enabled(logging.info, ENABLE_DISCORD_LOGGING, "Initialized Discord bot")
 
-    def get_user_color(self, username):
-        if username not in self.username_colors:
-            # Generate a consistent color number based on username
-            hash_value = int(hashlib.md5(username.encode()).hexdigest(), 16)
-            # IRC colors 2-13 (excluding 0,1,14,15 which are white/black/gray/white)
-            color_number = (hash_value % 12) + 2
-            self.username_colors[username] = color_number
-        return self.username_colors[username]
+    async def setup_hook(self):
+        # Runs on the live loop before the gateway connects, so the session exists
+        # before any event (including on_message during startup chunking) is dispatched
+        self.http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+            connector=aiohttp.TCPConnector(
+                limit=64, limit_per_host=16, ttl_dns_cache=300, keepalive_timeout=75
+            )
+        )
+        # Start relaying IRC messages right away; until on_ready has filled the
+        # emoji and member caches, :emoji: and @mentions are relayed as plain text
+        self.irc_bot.loop = asyncio.get_running_loop()
 
     async def on_ready(self):
         log_if_enabled(logging.info, ENABLE_DISCORD_LOGGING, "Discord bot logged in as %s", self.user)
+        self._rebuild_emoji_cache()
+
+        # Populate the mention cache from the gateway so IRC messages never wait on a REST call
+        for guild in self.guilds:
+            try:
+                # discord.py already chunks guilds at startup when the members intent is on
+                if not guild.chunked:
+                    await guild.chunk(cache=True)
+            except Exception as e:
+                logging.error("Failed to fetch members of guild %s: %s", guild.name, e)
+            for member in guild.members:
+                self._cache_user(member)
+            log_if_enabled(logging.info, ENABLE_DISCORD_LOGGING,
+                           "Cached %d members from guild %s", len(guild.members), guild.name)
+
+    def _rebuild_emoji_cache(self):
+        # Build a fresh dict and swap it in so the IRC thread never sees a half-filled cache
+        discord_emojis = {}
+        for guild in self.guilds:
+            for emoji in guild.emojis:
+                discord_emojis[emoji.name.lower()] = str(emoji)
+            logging.debug("Cached %d emojis from guild %s", len(guild.emojis), guild.name)
+        self.irc_bot.discord_emojis = discord_emojis
+
+    async def on_guild_emojis_update(self, guild, before, after):
+        self._rebuild_emoji_cache()
+
+    def _cache_user(self, user):
+        if user.global_name:
+            self.irc_bot.discord_users[user.global_name.lower()] = user.id
+        self.irc_bot.discord_users[user.name.lower()] = user.id
+
+    def _uncache_user(self, user):
+        for name in (user.global_name, user.name):
+            if name and self.irc_bot.discord_users.get(name.lower()) == user.id:
+                del self.irc_bot.discord_users[name.lower()]
+
+    async def on_member_join(self, member):
+        self._cache_user(member)
+
+    async def on_member_remove(self, member):
+        # Keep the user mentionable while they are still in another guild the bot is in
+        if not any(guild.get_member(member.id) for guild in self.guilds):
+            self._uncache_user(member)
+
+    async def on_user_update(self, before, after):
+        self._uncache_user(before)
+        self._cache_user(after)
+
+    async def close(self):
+        if self.http_session is not None:
+            await self.http_session.close()
+        await super().close()
 
     async def upload_to_sourcebin(self, content, language='text'):
         try:
             # Clean the content by removing null bytes and normalizing line endings
-            content = content.replace('\x00', '').replace('\r\n', '\n').replace('\r', '\n')
+            content = _CRLF_RE.sub('\n', content.translate(_CLEAN_TABLE))
             
             payload = {
                 "files": [{
@@ -303,24 +437,23 @@ class DiscordRelayBot(discord.Client):
                 }]
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    'https://sourceb.in/api/bins', 
-                    json=payload,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'Discord-IRC-Bridge/1.0'
-                    }
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return f"https://sourceb.in/{data['key']}"
-                    else:
-                        error_text = await response.text()
-                        logging.error(f"Failed to upload to sourceb.in: {response.status}, Response: {error_text}")
-                        return None
+            async with self.http_session.post(
+                'https://sourceb.in/api/bins',
+                data=orjson.dumps(payload),
+                headers={
+                    'Content-Type': 'application/json',
+                    'User-Agent': 'Discord-IRC-Bridge/1.0'
+                }
+            ) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    return f"https://sourceb.in/{data['key']}"
+                else:
+                    error_text = await response.text()
+                    logging.error("Failed to upload to sourceb.in: %s, Response: %s", response.status, error_text)
+                    return None
         except Exception as e:
-            logging.error(f"Error uploading to sourceb.in: {e}")
+            logging.error("Error uploading to sourceb.in: %s", e)
             return None
 
     async def on_message(self, message):
@@ -345,32 +478,45 @@ class DiscordRelayBot(discord.Client):
         content = message.content
 
         # Clean the content before processing
-        content = message.content.replace('\x00', '').replace('\r\n', '\n').replace('\r', '\n')
+        content = _CRLF_RE.sub('\n', content.translate(_CLEAN_TABLE))
 
         # Handle codeblocks
         if '```' in content:
-            codeblock_pattern = r'```(?:(\w+)\n)?([\s\S]*?)```'
-            for match in re.finditer(codeblock_pattern, content):
-                language = match.group(1) or 'text'
-                code = match.group(2).strip()
-                
-                # Upload to sourceb.in
-                paste_url = await self.upload_to_sourcebin(code, language)
+            matches = list(_CODEBLOCK_RE.finditer(content))
+            codes = [match.group(2).strip() for match in matches]
+
+            # Upload all codeblocks to sourceb.in concurrently
+            paste_urls = await asyncio.gather(*(
+                self.upload_to_sourcebin(code, match.group(1) or 'text')
+                for match, code in zip(matches, codes)
+            ))
+
+            # Rebuild the content in one pass, replacing each codeblock
+            parts = []
+            cursor = 0
+            for match, code, paste_url in zip(matches, codes, paste_urls):
+                parts.append(content[cursor:match.start()])
                 if paste_url:
                     # Replace the codeblock with the URL
-                    content = content.replace(match.group(0), f'[Code: {paste_url}]')
+                    parts.append(f'[Code: {paste_url}]')
                 else:
                     # If upload fails, truncate and clean the code
                     preview = code[:50].replace('\n', ' ') + "..." if len(code) > 50 else code.replace('\n', ' ')
-                    content = content.replace(match.group(0), f'[Code: {preview}]')
+                    parts.append(f'[Code: {preview}]')
+                cursor = match.end()
+            parts.append(content[cursor:])
+            content = ''.join(parts)
 
         # Handle mentions
-        for mention in message.mentions:
-            content = content.replace(f'<@{mention.id}>', f'@{mention.display_name}')
-            content = content.replace(f'<@!{mention.id}>', f'@{mention.display_name}')
+        if message.mentions:
+            name_by_id = {str(mention.id): mention.display_name for mention in message.mentions}
+            content = _MENTION_TAG_RE.sub(
+                lambda m: f'@{name_by_id[m.group(1)]}' if m.group(1) in name_by_id else m.group(0),
+                content
+            )
 
         # Convert Discord emoji format <:name:id> to :name:
-        content = re.sub(r'<(a)?:([a-zA-Z0-9_]+):[0-9]+>', r':\2:', content)
+        content = _DISCORD_EMOJI_RE.sub(r':\2:', content)
 
         # Collect all attachments and embeds
         attachment_urls = []
@@ -383,28 +529,38 @@ class DiscordRelayBot(discord.Client):
             attachment_urls.extend(embed_urls)
 
         # Format and send the main message
-        color_code = self.get_user_color(author_name)
-        
+        prefix = f"<\x03{_user_color(author_name)}{author_name}\x03> "
+
         # Send the main content first if it exists
         if content:
-            formatted_message = f"<\x03{color_code}{author_name}\x03> {content}"
-            formatted_message = formatted_message.replace('\n', ' ').strip()
+            formatted_message = (prefix + content).replace('\n', ' ').strip()
             
             log_if_enabled(logging.debug, ENABLE_DISCORD_LOGGING, 
                            "Relaying message to IRC channel %s: %s", 
                            irc_channel, formatted_message)
             self.irc_bot.connection.privmsg(irc_channel, formatted_message)
         
-        # Send attachments/embeds in separate messages to avoid IRC length limits
-        # IRC typically has a 512-byte limit, so we'll be conservative and send each attachment separately
+        # Send attachments/embeds separately from the main message, packing as many
+        # as fit in one message without exceeding the IRC length limit
         if attachment_urls:
-            for attachment_url in attachment_urls:
-                attachment_message = f"<\x03{color_code}{author_name}\x03> {attachment_url}"
-                
-                log_if_enabled(logging.debug, ENABLE_DISCORD_LOGGING, 
-                               "Relaying attachment to IRC channel %s: %s", 
-                               irc_channel, attachment_message)
-                self.irc_bot.connection.privmsg(irc_channel, attachment_message)
+            attachment_message = prefix + attachment_urls[0]
+            message_bytes = len(attachment_message.encode())
+            for attachment_url in attachment_urls[1:]:
+                url_bytes = len(attachment_url.encode())
+                if message_bytes + 1 + url_bytes > IRC_MAX_MESSAGE_BYTES:
+                    self.send_attachment_message(irc_channel, attachment_message)
+                    attachment_message = prefix + attachment_url
+                    message_bytes = len(attachment_message.encode())
+                else:
+                    attachment_message += ' ' + attachment_url
+                    message_bytes += 1 + url_bytes
+            self.send_attachment_message(irc_channel, attachment_message)
+
+    def send_attachment_message(self, irc_channel, attachment_message):
+        log_if_enabled(logging.debug, ENABLE_DISCORD_LOGGING,
+                       "Relaying attachment to IRC channel %s: %s",
+                       irc_channel, attachment_message)
+        self.irc_bot.connection.privmsg(irc_channel, attachment_message)
 
 
 # Initialize the IRC bot with the required parameters
@@ -417,14 +573,29 @@ irc_bot = IRCRelayBot(
     channel_webhook_map=IRC_TO_DISCORD_WEBHOOKS
 )
 
-# Run the IRC bot in a separate thread
+# Run the IRC bot in a separate thread, reconnecting with exponential backoff
 async def run_irc_bot():
-    try:
-        log_if_enabled(logging.info, ENABLE_IRC_LOGGING, "Starting IRC bot")
-        # Run the IRC bot's connection loop in a separate thread
-        await asyncio.to_thread(irc_bot.start)
-    except Exception as e:
-        log_if_enabled(logging.error, ENABLE_IRC_LOGGING, "IRC bot encountered an error: %s", e)
+    delay = IRC_RECONNECT_INITIAL_DELAY
+    while True:
+        try:
+            log_if_enabled(logging.info, ENABLE_IRC_LOGGING, "Starting IRC bot")
+            # Run the IRC bot's connection loop in a separate thread
+            registered = await asyncio.to_thread(irc_bot.start)
+        except asyncio.CancelledError:
+            # Let the worker thread's event loop exit as well
+            irc_bot.stop()
+            raise
+        except Exception as e:
+            log_if_enabled(logging.error, ENABLE_IRC_LOGGING, "IRC bot encountered an error: %s", e)
+            registered = False
+
+        # Only a connection the server fully accepted resets the backoff, so a server
+        # that drops us during registration (ban, K-line, throttling) keeps backing off
+        if registered:
+            delay = IRC_RECONNECT_INITIAL_DELAY
+        logging.warning("Attempting to reconnect to IRC in %d seconds...", delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, IRC_RECONNECT_MAX_DELAY)
 
 # Initialize the Discord bot with the mapping of Discord channel IDs to IRC channels
 discord_bot = DiscordRelayBot(irc_bot, DISCORD_TO_IRC_CHANNELS)
@@ -439,7 +610,7 @@ async def main():
         # Wait for both tasks to complete (or fail)
         await asyncio.gather(irc_task, discord_task)
     except Exception as e:
-        logging.error(f"Error in main loop: {e}")
+        logging.error("Error in main loop: %s", e)
         # Make sure to close both bots
         if not irc_task.done():
             irc_task.cancel()